@@ -1,5 +1,6 @@
-from random import seed, choice, randint
-from ReplayHandler import ReplayHandler
+from collections import deque
+from random import seed, choice, randint, randrange
+from replay_codec import encode_to_binary
 
 # --- Game Config ---
 WIDTH = 4
@@ -8,17 +9,25 @@ UP = "w"
 LEFT = "a"
 DOWN = "s"
 RIGHT = "d"
+DIR_IDX = {UP: 0, RIGHT: 1, DOWN: 2, LEFT: 3}  # clockwise
+
+# Empty board, every row is a newline followed by ". " per cell
+BOARD = bytearray(b"\n" + b". " * WIDTH) * HEIGHT
 
 # Initial state
 start = HEIGHT // 2 * WIDTH
-snake = [start, start + 1, start + 2]
+snake = deque([start, start + 1, start + 2])
 apple = start + WIDTH - 1
+snake_len = len(snake)
+occ = bytearray(WIDTH * HEIGHT)  # 1 for every cell covered by the snake
+for pos in snake:
+    occ[pos] = 1
 game_seed = randint(0, 2**32 - 1)
 seed(game_seed)
 
 # Replay tracking
-segments = []
-current_segment = []
+moves = bytearray()  # one turn character per move
+segment_ends = []    # length of moves after every collected apple
 
 # --- Helper Functions ---
 def cordToID(x, y) -> int:
@@ -29,33 +38,35 @@ def idToCord(id) -> list[int]:
     x = id % WIDTH
     return [x, y]
 
+def cellOffset(id) -> int:
+    return id // WIDTH * (2 * WIDTH + 1) + 1 + id % WIDTH * 2
+
 def printBoard(snake, apple):
-    string = ""
-    for i in range(WIDTH * HEIGHT):
-        if i % WIDTH == 0:
-            string += "\n"
-        if i in snake:
-            string += "# "
-        elif i == apple:
-            string += "@ "
-        else:
-            string += ". "
-    print(string)
-
-def newApple(snake, newHead):
-    all_cells = set(range(WIDTH * HEIGHT))
-    free_cells = list(all_cells - set(snake) - {newHead})
+    board = BOARD[:]
+    if apple is not None:
+        board[cellOffset(apple)] = ord("@")
+    for i in snake:
+        board[cellOffset(i)] = ord("#")
+    print(board.decode())
+
+def newApple(occ, free, newHead):
+    # Mostly empty board, guessing hits a free cell after a few tries
+    if free * 2 > len(occ):
+        while True:
+            cell = randrange(len(occ))
+            if not occ[cell] and cell != newHead:
+                return cell
+
+    free_cells = [i for i, taken in enumerate(occ) if not taken and i != newHead]
     if not free_cells:
         return None  # No free space left, game should end
     return choice(free_cells)
 
-def dirToChar(last_dir, dir):
-    if dir == last_dir:
-        return 'S'
-    elif (last_dir == UP and dir == LEFT) or (last_dir == LEFT and dir == DOWN) or (last_dir == DOWN and dir == RIGHT) or (last_dir == RIGHT and dir == UP):
-        return 'L'
-    else:
-        return 'R'
+def dirToCode(last_dir, dir):
+    # Byte value of the move character ('S', 'R', 'L') for the moves bytearray
+    # Clockwise quarter turns from last_dir to dir: 0 -> S, 1 -> R, 3 -> L
+    # A reversal (2) counts as R, the snake runs into itself anyway
+    return b"SRRL"[(DIR_IDX[dir] - DIR_IDX[last_dir]) & 3]
 
 # --- Game Loop ---
 printBoard(snake, apple)
@@ -85,22 +96,23 @@ while True:
 
     # Update snake And Track Replay
     collected_apple = newHead == apple
-    current_segment.append(dirToChar(last_dir, dir))
+    moves.append(dirToCode(last_dir, dir))
     if collected_apple:
-        apple = newApple(snake, newHead)
         score += 1
-        segments.append(''.join(current_segment))
-        current_segment = []
+        snake_len += 1
+        apple = newApple(occ, WIDTH * HEIGHT - snake_len, newHead)
+        segment_ends.append(len(moves))
     else:
-        tail = snake.pop(0)
+        tail = snake.popleft()
+        occ[tail] = 0
     last_dir = dir
 
     # Game over checks
-    if len(snake) == HEIGHT * WIDTH - 1:
+    if snake_len == HEIGHT * WIDTH:
         print("YOU WIN")
         reason = 1
         break
-    elif newHead in snake or newHead < 0 or newHead >= WIDTH * HEIGHT:
+    elif newHead < 0 or newHead >= WIDTH * HEIGHT or occ[newHead]:
         print("GAME OVER")
         reason = 2
         break
@@ -110,11 +122,13 @@ while True:
         break
 
     snake.append(newHead)
+    occ[newHead] = 1
     printBoard(snake, apple)
 
 # Add any remaining moves
-if current_segment:
-    segments.append(''.join(current_segment))
+if len(moves) > (segment_ends[-1] if segment_ends else 0):
+    segment_ends.append(len(moves))
+segments = [moves[a:b].decode() for a, b in zip([0] + segment_ends, segment_ends)]
 
 # --- Build Replay JSON ---
 replay = {
@@ -134,4 +148,4 @@ replay = {
 }
 
 # --- Save to File ---
-ReplayHandler().encode_to_binary(replay, "replays/replay_" + str(game_seed) + ".bin")
+encode_to_binary(replay, "replays/replay_" + str(game_seed) + ".bin")
@@ -2,14 +2,26 @@ import json
 import struct
 import pygame
 import time
+from collections import deque
 from pathlib import Path
-from ReplayHandler import ReplayHandler
+from replay_codec import decode_to_dict
 
 # -----------------------------
 # Optional binary decoder (from earlier)
 # -----------------------------
 DIRECTION_MAP = {"w":0, "d":1, "s":2, "a":3}
 REVERSE_DIR = {v:k for k,v in DIRECTION_MAP.items()}
+DIR_VECTORS = {"w": (0, -1), "d": (1, 0), "s": (0, 1), "a": (-1, 0)}  # (dx, dy) on screen
+
+# Window was uncovered or restored and may have lost its contents
+EXPOSE_EVENTS = (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE)
+
+# Absolute direction after a relative move: NEXT_DIR[dir][move]
+# Directions are numbered clockwise, R turns +1 and L turns -1 (+3)
+NEXT_DIR = {
+    dir: {move: REVERSE_DIR[(idx + turn) & 3] for move, turn in (("S", 0), ("R", 1), ("L", 3))}
+    for dir, idx in DIRECTION_MAP.items()
+}
 
 # -----------------------------
 # Snake Replay Viewer
@@ -21,17 +33,34 @@ class SnakeReplayViewer:
     SNAKE_COLOR = (0, 255, 0)
     HEAD_COLOR = (50, 255, 50)
     APPLE_COLOR = (255, 60, 60)
+    EYE_COLOR = (255, 255, 255)
     GRID_COLOR = (50, 50, 50)
     SPEED = 20  # frames per second
+    IDLE_SPEED = 5  # frames per second while the window is not focused
 
 
-    def __init__(self, replay):
+    def __init__(self, replay, render=True):
         self.replay = replay
+        self.render = render
         self.map_w = replay["metadata"]["map"]["width"]
         self.map_h = replay["metadata"]["map"]["height"]
 
         init = replay["metadata"]["initial"]
-        self.snake = list(init["snake"])
+        self.snake = deque(init["snake"])
+
+        # Cell index offset of one step in each direction
+        self.delta = {'w': -self.map_w, 's': self.map_w, 'a': -1, 'd': 1}
+
+        # Without rendering only the snake is tracked, no window or surfaces
+        if self.render:
+            self.init_display()
+
+    def init_display(self):
+        # Pixel center and rect of every cell, including the rows above and
+        # below the map, where the head ends up after running out of it
+        cells = range(-self.map_w, (self.map_h + 1) * self.map_w)
+        self.centers = {cell: self.cell_center(cell) for cell in cells}
+        self.rects = {cell: self.cell_rect(cell) for cell in cells}
 
         pygame.init()
         self.screen = pygame.display.set_mode(
@@ -40,107 +69,208 @@ class SnakeReplayViewer:
         pygame.display.set_caption("Snake Replay Viewer")
         self.clock = pygame.time.Clock()
 
-    def draw_checkerboard(self):
+        # Only quit and expose events are of interest, keep everything else off the queue
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([pygame.QUIT, *EXPOSE_EVENTS])
+
+        # All cached surfaces below are converted to the display format right
+        # after creation (needs set_mode first), so blits skip pixel conversion
+
+        # Checkerboard never changes, render it once
+        self.background = pygame.Surface(self.screen.get_size()).convert()
+        self.background.fill(self.BG_DARK)
         for y in range(self.map_h):
-            for x in range(self.map_w):
-                color = self.BG_LIGHT if (x + y) % 2 == 0 else self.BG_DARK
-                rect = pygame.Rect(
-                    x * self.CELL_SIZE,
-                    y * self.CELL_SIZE,
-                    self.CELL_SIZE,
-                    self.CELL_SIZE
-                )
-                pygame.draw.rect(self.screen, color, rect)
+            for x in range(y % 2, self.map_w, 2):
+                self.background.fill(self.BG_LIGHT, self.rects[y * self.map_w + x])
 
-    def draw_snake(self):
-        if len(self.snake) < 2:
-            return
+        # Back buffer with checkerboard and snake body,
+        # each move only redraws the areas that changed
+        self.board = pygame.Surface(self.screen.get_size()).convert()
+        self.body_rects = deque()  # rect of every body segment, tail first
+        self.apple = None  # cell of the apple on the board
+        self.draw_checkerboard()
+        self.draw_snake()
+
+        # Apple sprite, drawn onto the board beneath the body, and head
+        # sprites, blitted on top of the board each frame, one per direction
+        # so the eyes look where the snake is going
+        self.apple_surf = self.make_disc(self.APPLE_COLOR).convert_alpha()
+        self.head_surfs = {dir: self.make_head(dir) for dir in DIR_VECTORS}
+
+    def make_disc(self, color):
+        surface = pygame.Surface((self.CELL_SIZE, self.CELL_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(
+            surface,
+            color,
+            (self.CELL_SIZE // 2, self.CELL_SIZE // 2),
+            self.CELL_SIZE // 3
+        )
+        return surface
+
+    def make_head(self, direction):
+        surface = self.make_disc(self.HEAD_COLOR)
+
+        # Eyes sit a bit ahead of the center, one on each side
+        dx, dy = DIR_VECTORS[direction]
+        center = self.CELL_SIZE // 2
+        offset = self.CELL_SIZE // 6
+        for side in (-1, 1):
+            pygame.draw.circle(
+                surface,
+                self.EYE_COLOR,
+                (center + (dx - dy * side) * offset, center + (dy + dx * side) * offset),
+                self.CELL_SIZE // 10
+            )
+        return surface.convert_alpha()
+
+    def cell_center(self, cell):
+        return (cell % self.map_w * self.CELL_SIZE + self.CELL_SIZE // 2,
+                cell // self.map_w * self.CELL_SIZE + self.CELL_SIZE // 2)
+
+    def cell_rect(self, cell):
+        return pygame.Rect(
+            cell % self.map_w * self.CELL_SIZE,
+            cell // self.map_w * self.CELL_SIZE,
+            self.CELL_SIZE,
+            self.CELL_SIZE
+        )
 
-        # Convert snake segment grid coordinates → pixel coordinates
-        points = [
-            (body % self.map_w * self.CELL_SIZE + self.CELL_SIZE // 2,
-             body // self.map_w * self.CELL_SIZE + self.CELL_SIZE // 2)
-            for body in self.snake
-        ]
+    def draw_checkerboard(self):
+        self.board.blit(self.background, (0, 0))
 
-        # Draw body line
-        pygame.draw.lines(self.screen, self.SNAKE_COLOR, False, points, self.CELL_SIZE // 3)
+    def restore_area(self, rect):
+        """
+        Redraws an area of the board from the background and all body
+        segments passing through it, returns the rect. A rect overlapping the
+        apple grows to cover all of it, the apple lies beneath the body.
+        """
+        apple_rect = self.rects.get(self.apple)
+        if apple_rect is not None and rect.colliderect(apple_rect):
+            rect = rect.union(apple_rect)
+            self.board.blit(self.background, rect, rect)
+            self.board.blit(self.apple_surf, apple_rect)
+        else:
+            self.board.blit(self.background, rect, rect)
+        for i in rect.collidelistall(self.body_rects):
+            self.draw_body_segment(self.snake[i], self.snake[i + 1])
+        return rect
 
-        # --- Draw head circle ---
-        hx, hy = points[-1]
-        pygame.draw.circle(self.screen, self.HEAD_COLOR, (hx, hy), self.CELL_SIZE // 3)
+    def draw_snake(self):
+        # Segment by segment, their rects are needed to erase them again.
+        # Segments are not always between neighbouring cells, moving off
+        # the side of the map continues on the next row
+        for i in range(len(self.snake) - 1):
+            self.body_rects.append(self.draw_body_segment(self.snake[i], self.snake[i + 1]))
 
+    def draw_body_segment(self, start, end):
+        return pygame.draw.line(
+            self.board,
+            self.SNAKE_COLOR,
+            self.centers[start],
+            self.centers[end],
+            self.CELL_SIZE // 3
+        )
 
     def move_snake(self, direction, apple):
-        new_head = self.snake[-1]
-        if direction == 'w': new_head -= self.map_w
-        elif direction == 's': new_head += self.map_w
-        elif direction == 'a': new_head -= 1
-        elif direction == 'd': new_head += 1
+        """
+        Moves the snake on the board and returns the rects of all changed areas.
+        """
+        new_head = self.snake[-1] + self.delta[direction]
+
+        if not self.render:
+            if new_head != apple:
+                self.snake.popleft()
+            self.snake.append(new_head)
+            return []
+
+        # Cells of the old and new head, where the head sprite moves, and the
+        # new segment, which reaches beyond them when it wraps to another row
+        changed = [self.rects[self.snake[-1]], self.rects[new_head]]
+        self.body_rects.append(self.draw_body_segment(self.snake[-1], new_head))
+        changed.append(self.body_rects[-1])
         self.snake.append(new_head)
 
         # Check for apple
-        if self.snake[-1] != apple:
-            self.snake.pop(0)
+        if new_head != apple:
+            # Drop the tail segment, then bring back whatever it covered
+            self.snake.popleft()
+            changed.append(self.restore_area(self.body_rects.popleft()))
+
+        return changed
+
+    def place_apple(self, apple):
+        """
+        Moves the apple on the board and returns the rects of all changed areas.
+        """
+        changed = []
+        if self.apple is not None:
+            old, self.apple = self.apple, None
+            changed.append(self.restore_area(self.rects[old]))
+        self.apple = apple
+        changed.append(self.restore_area(self.rects[apple]))
+        return changed
 
     def play(self):
+        if self.render:
+            # Show the whole board once, afterwards only changed cells are updated
+            self.screen.blit(self.board, (0, 0))
+            pygame.display.flip()
+
+        frame = 0
+        dirty = []
         dir = 'd'  # Initial direction placeholder
         for segment in self.replay["segments"]:
             # Recalculate rotations into absolute directions
             moves = []
             for move in segment:
-                if move == 'S':
-                    moves.append(dir)
-                elif move == 'L':
-                    if dir == 'w': dir = 'a'
-                    elif dir == 'a': dir = 's'
-                    elif dir == 's': dir = 'd'
-                    elif dir == 'd': dir = 'w'
-                    moves.append(dir)
-                elif move == 'R':
-                    if dir == 'w': dir = 'd'
-                    elif dir == 'd': dir = 's'
-                    elif dir == 's': dir = 'a'
-                    elif dir == 'a': dir = 'w'
-                    moves.append(dir)
+                dir = NEXT_DIR[dir][move]
+                moves.append(dir)
 
             # Get current apple position
-            apple = self.snake[-1]
-            for move in moves:
-                if move == 'w': apple -= self.map_w
-                elif move == 's': apple += self.map_w
-                elif move == 'a': apple -= 1
-                elif move == 'd': apple += 1
+            apple = self.snake[-1] + sum(map(self.delta.__getitem__, moves))
+
+            if not self.render:
+                for move in moves:
+                    self.move_snake(move, apple)
+                continue
 
+            dirty += self.place_apple(apple)
             for move in moves:
-                # Event handling for quitting
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
+                # Event handling for quitting, every 4th frame is often enough
+                frame += 1
+                exposed = False
+                if frame & 3 == 0:
+                    if pygame.event.peek(pygame.QUIT):
                         pygame.quit()
                         return
+                    exposed = bool(pygame.event.get(EXPOSE_EVENTS))
 
                 # Move snake
-                self.move_snake(move, apple)
-
-                # Draw checkerboard background
-                self.draw_checkerboard()
-
-                # Draw apple as a circle
-                pygame.draw.circle(
-                    self.screen,
-                    self.APPLE_COLOR,
-                    (apple % self.map_w * self.CELL_SIZE + self.CELL_SIZE // 2,
-                    apple // self.map_w * self.CELL_SIZE + self.CELL_SIZE // 2),
-                    self.CELL_SIZE // 3
-                )
+                dirty += self.move_snake(move, apple)
 
-                # Draw snake line + eyes
-                self.draw_snake()
+                if exposed:
+                    # Only updating the changed areas would leave stale ones behind
+                    self.screen.blit(self.board, (0, 0))
+                    self.screen.blit(self.head_surfs[move], self.rects[self.snake[-1]])
+                    pygame.display.flip()
+                else:
+                    # Restore changed areas from the board, then the head in one call
+                    self.screen.blits(
+                        [(self.board, rect, rect) for rect in dirty] +
+                        [(self.head_surfs[move], self.rects[self.snake[-1]])],
+                        doreturn=False
+                    )
+                    pygame.display.update(dirty)
+                dirty = []
 
-                pygame.display.flip()
-                self.clock.tick(self.SPEED)
+                # Nobody is watching a window in the background, slow down
+                self.clock.tick(self.SPEED if pygame.key.get_focused() else self.IDLE_SPEED)
 
         print("Replay finished.")
+        if not self.render:
+            print("Final snake:", list(self.snake))
+            return
+
         time.sleep(1)
         pygame.quit()
 
@@ -150,8 +280,16 @@ class SnakeReplayViewer:
 # -----------------------------
 
 if __name__ == "__main__":
-    path = input("Enter replay file (.bin): ").strip()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play back a snake replay file.")
+    parser.add_argument("path", nargs="?", help="replay file (.bin), asked for if omitted")
+    parser.add_argument("--no-render", action="store_true",
+                        help="skip the window and only compute the final snake")
+    args = parser.parse_args()
+
+    path = args.path or input("Enter replay file (.bin): ").strip()
 
-    replay = ReplayHandler().decode_to_dict(path)
-    viewer = SnakeReplayViewer(replay)
+    replay = decode_to_dict(path)
+    viewer = SnakeReplayViewer(replay, render=not args.no_render)
     viewer.play()
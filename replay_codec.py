@@ -0,0 +1,263 @@
+"""
+Encoding and decoding of snake game replay files.
+
+Example Input Data Structure:
+{
+  "version": "5.0",
+  "result": {"score": 2, "reason": 2},
+  "metadata": {
+    "map": {"width": 10, "height": 10},
+    "seed": 12345,
+    "initial": {"snake": [40, 41, 42]}
+  },
+  "segments": [
+      "SSSSS",
+      "LLR",
+      "RSS"
+  ]
+}
+
+The Binary Replay File Format:
+-------------------------------------------------------------
+| Header: "SNAK"                                      -> 4 bytes
+    or "SNAX" + flags (B)                             -> 5 bytes
+| Result:
+    - score (H)                                       -> 2 bytes
+    - reason code (B)                                 -> 1 bytes
+| Metadata:
+    - Map width (B), height (B)                       -> 2 bytes
+    - Map seed (I)                                    -> 4 bytes
+    - Initial snake length (B) + positions (H * n)    -> variable (n=3 => 7 bytes)
+| For each segment:
+    - packed moves + end of segment                   -> 2 bits * moves + 2 bits
+| Padding to full byte                                -> 0 - 6 bits
+
+With the rle flag set, the moves are stored as the number of runs (I),
+one packed move per run (2 bits each) and the run lengths as varints.
+With the lz4 flag set, the (run-length encoded) moves are stored as their
+length (I) followed by an lz4 block. The combination of flags giving the
+smallest file is used, a plain "SNAK" file unless flags save at least a byte.
+"""
+
+import mmap
+import re
+import struct
+from array import array
+from functools import lru_cache
+
+try:
+    import lz4.block
+except ImportError:  # optional, replays are written uncompressed without it
+    lz4 = None
+
+# Pre-compiled struct formats, so the format strings are not parsed on every call
+_U32 = struct.Struct("I")
+# Score (H), reason (B), map width (B), height (B), initial snake length (B)
+_HDR = struct.Struct("HBBBB")
+
+@lru_cache
+def _file_header(magic_len: int, snake_len: int) -> struct.Struct:
+    """
+    Struct of everything in front of the moves: magic, result, map,
+    initial snake and seed. Native byte order without alignment padding.
+    """
+    return struct.Struct(f"={magic_len}sHBBBB{snake_len}HI")
+
+# Flags of "SNAX" files
+_FLAG_LZ4 = 0b01  # packed moves are lz4 compressed
+_FLAG_RLE = 0b10  # moves are run-length encoded
+
+# Move character -> 2 bit code as base 4 digit, one digit per character
+# "|" marks the end of a segment
+_TRANS = str.maketrans({'S': '0', 'R': '1', 'L': '2', '|': '3'})
+
+# Run of the same move character
+_RUN = re.compile(r"(.)\1*")
+# Pairs of different move characters, every one of them starts a new run
+_RUN_STARTS = tuple(a + b for a in "SRL|" for b in "SRL|" if a != b)
+
+# Packed byte -> its 4 move characters, "|" marks the end of a segment
+_UNPACK = tuple(
+    "".join("SRL|"[(byte >> shift) & 0b11] for shift in (6, 4, 2, 0))
+    for byte in range(256)
+)
+
+def _pack(codes: str) -> bytes:
+    """
+    Packs a string of base 4 digits (2 bit codes) into bytes, 4 codes per byte.
+    The string is padded with 00 codes to a full byte boundary.
+    """
+    if not codes:
+        return b""
+    codes += "0" * (-len(codes) % 4)
+    return int(codes, 4).to_bytes(len(codes) // 4, "big")
+
+def _unpack(buf) -> str:
+    """
+    Unpacks bytes into their move characters, 4 per byte.
+    End of segment codes are returned as "|".
+    """
+    return "".join(map(_UNPACK.__getitem__, buf))
+
+def _count_runs(stream: str) -> int:
+    """
+    Counts the runs of a stream of moves without splitting it up.
+    """
+    return sum(map(stream.count, _RUN_STARTS)) + bool(stream)
+
+def _encode_runs(stream: str) -> bytes:
+    """
+    Run-length encodes a stream of moves into the number of runs (I),
+    the packed move of every run and the run lengths as 7 bit varints.
+    """
+    runs = [run.group() for run in _RUN.finditer(stream)]
+    lengths = list(map(len, runs))
+    if max(lengths, default=0) < 0x80:
+        lengths = bytes(lengths)  # every varint is a single byte
+    else:
+        varints = bytearray()
+        for n in lengths:
+            while n >= 0x80:
+                varints.append(n & 0x7F | 0x80)
+                n >>= 7
+            varints.append(n)
+        lengths = varints
+    return _U32.pack(len(runs)) + _pack("".join(run[0] for run in runs).translate(_TRANS)) + lengths
+
+def _decode_runs(block) -> str:
+    """
+    Expands run-length encoded moves, End of Segment codes are returned as "|".
+    """
+    count, = _U32.unpack_from(block)
+    end = _U32.size + (count + 3) // 4
+    moves = _unpack(block[_U32.size:end])[:count]
+
+    lengths = []
+    n = shift = 0
+    for byte in block[end:]:
+        n |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            lengths.append(n)
+            n = shift = 0
+    if shift or len(moves) != count or len(lengths) != count:
+        raise ValueError("Corrupt run-length encoded moves")
+    return "".join(map(str.__mul__, moves, lengths))
+
+def _compress(packed: bytes) -> bytes:
+    """
+    Compresses packed moves into their length (I) followed by an lz4 block.
+    """
+    compressed = lz4.block.compress(packed, mode="high_compression", compression=9, store_size=False)
+    return _U32.pack(len(packed)) + compressed
+
+def _decompress(block) -> bytes:
+    if lz4 is None:
+        raise ValueError("Replay is lz4 compressed, but lz4 is not installed")
+    size, = _U32.unpack_from(block)
+    try:
+        return lz4.block.decompress(block[_U32.size:], uncompressed_size=size)
+    except lz4.block.LZ4BlockError as e:
+        raise ValueError("Corrupt lz4 compressed moves") from e
+
+def encode_moves_bitpacked(segments: list) -> bytes:
+    """
+    Encodes all segments of moves ('S', 'R', 'L') into one bit-packed byte array.
+    Each move is represented by 2 bits:
+        00 -> 'S'
+        01 -> 'R'
+        10 -> 'L'
+        11 -> End of Segment
+    Every segment is closed by an End of Segment, the last byte is padded with 00.
+    """
+    return _pack("|".join([*segments, ""]).translate(_TRANS))
+
+def encode_to_binary(data: dict, output_path: str) -> bytes:
+    """
+    Encodes the given replay data dictionary into a binary format.
+    """
+    meta = data["metadata"]
+    segments = data["segments"]
+    result = data["result"]
+
+    # Every way of storing the moves by its flags, the smallest file wins.
+    # Flagged files need an extra byte for the flags, ties stay plain "SNAK"
+    stream = "|".join([*segments, ""])
+    candidates = {0: _pack(stream.translate(_TRANS))}
+
+    # Every run takes at least one length byte and a quarter byte for its move,
+    # with more runs than that run-length encoding can't beat the plain stream
+    if _count_runs(stream) * 5 // 4 + _U32.size < len(candidates[0]):
+        candidates[_FLAG_RLE] = _encode_runs(stream)
+
+    if lz4 is not None:
+        for flags, block in list(candidates.items()):
+            candidates[flags | _FLAG_LZ4] = _compress(block)
+    flags, moves = min(candidates.items(), key=lambda item: len(item[1]) + (item[0] != 0))
+
+    # Allocate the whole file at once and write the header in a single pack
+    magic = b"SNAX" + bytes((flags,)) if flags else b"SNAK"
+    snake = meta["initial"]["snake"]
+    header = _file_header(len(magic), len(snake))
+    binary_data = bytearray(header.size + len(moves))
+    header.pack_into(
+        binary_data, 0,
+        magic,
+        result["score"], result["reason"],
+        meta["map"]["width"], meta["map"]["height"],
+        len(snake), *snake,
+        meta["seed"]
+    )
+
+    # Packed moves
+    binary_data[header.size:] = moves
+
+    # Write to file
+    with open(output_path, "wb") as f:
+        f.write(binary_data)
+
+    print(f"✅ Replay written to {output_path} ({len(binary_data)} bytes)")
+
+def decode_to_dict(input_path: str) -> dict:
+    with open(input_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = 0
+        header = data[offset:offset + 4]
+        offset += 4
+        flags = 0
+        if header == b"SNAX":
+            flags = data[offset]
+            offset += 1
+            if flags & ~(_FLAG_LZ4 | _FLAG_RLE):
+                raise ValueError("Unsupported replay flags")
+        elif header != b"SNAK":
+            raise ValueError("Invalid file format")
+
+        # Result, map and initial snake length
+        score, reason, width, height, snake_len = _HDR.unpack_from(data, offset)
+        offset += _HDR.size
+
+        # Snake
+        snake = array("H", data[offset:offset + snake_len * 2]).tolist()
+        offset += snake_len * 2
+
+        # Seed
+        seed, = _U32.unpack_from(data, offset)
+        offset += 4
+
+        # Segments
+        # Everything after the last end-of-segment marker is padding
+        with memoryview(data)[offset:] as block:
+            moves = _decompress(block) if flags & _FLAG_LZ4 else block
+            moves = _decode_runs(moves) if flags & _FLAG_RLE else _unpack(moves)
+            segments = moves.split("|")[:-1]
+
+    return {
+        "version": "5.0",
+        "result": {"score": score, "reason": reason},
+        "metadata": {
+            "map": {"width": width, "height": height},
+            "seed": seed,
+            "initial": {"snake": snake}
+        },
+        "segments": segments
+    }